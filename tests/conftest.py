@@ -0,0 +1,96 @@
+import os
+import json
+import sqlite3
+import argparse
+import threading
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHANNEL_URL = 'https://www.youtube.com/@benchmark'
+
+def load_module(name, filename):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+_scraper = load_module('yt_scraper', 'yt-scraper.py')
+_bench = load_module('yt_bench', 'yt-bench.py')
+
+@pytest.fixture
+def scraper():
+    return _scraper
+
+@pytest.fixture
+def bench():
+    return _bench
+
+@pytest.fixture
+def stand_in():
+    config = argparse.Namespace(channel_size=120, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                                private_rate=0.02, unavailable_rate=0.1, segments=5)
+    server = _bench.make_server(config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path
+
+def scraper_argv(home, base_url, *extra, folder='channel', metrics_file=None):
+    return ['--source', CHANNEL_URL, folder,
+            '--api-endpoint', base_url,
+            '--transcript-endpoint', f"{base_url}/transcript",
+            '--api-key', 'test',
+            '--quota-file', str(home / 'quota.json'),
+            '--cache-dir', str(home / 'cache'),
+            '--index', str(home / 'index.db'),
+            '--metrics-file', str(metrics_file or home / 'metrics.json'),
+            '--rate-limit', '0',
+            *extra]
+
+@pytest.fixture
+def argv_for(home):
+    def argv(base_url, *extra, folder='channel', metrics_file=None):
+        return scraper_argv(home, base_url, *extra, folder=folder, metrics_file=metrics_file)
+    return argv
+
+@pytest.fixture
+def run_scraper(home):
+    # Runs main() in-process against the stand-in and returns the run's metrics summary.
+    pytest.importorskip('googleapiclient')
+
+    def run(base_url, *extra, folder='channel', run_name='run'):
+        metrics_file = home / f"{run_name}-metrics.json"
+        _scraper.main(scraper_argv(home, base_url, *extra, folder=folder, metrics_file=metrics_file))
+        with open(metrics_file, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    return run
+
+@pytest.fixture
+def listed_video_ids():
+    # Video IDs the stand-in returns details for, i.e. everything that isn't private.
+    def listed(config, count=None):
+        video_ids = [_bench.video_id_for(number) for number in range(count or config.channel_size)]
+        return [video_id for video_id in video_ids
+                if not _bench.is_unlucky(video_id, 'private', config.private_rate)]
+    return listed
+
+@pytest.fixture
+def state_db(home):
+    def connect(folder='channel'):
+        return sqlite3.connect(os.path.join(_scraper.get_output_path(folder), _scraper.STATE_DB_NAME))
+    return connect
+
+@pytest.fixture
+def video_statuses(state_db):
+    def statuses(folder='channel'):
+        with state_db(folder) as conn:
+            return dict(conn.execute("SELECT video_id, status FROM videos"))
+    return statuses
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import signal
+import sqlite3
+import subprocess
+import multiprocessing
+from types import SimpleNamespace
+
+import pytest
+
+def test_budget_rotates_keys_and_persists_usage(scraper, tmp_path):
+    path = str(tmp_path / 'quota.json')
+    budget = scraper.QuotaBudget(['k1', 'k2'], daily_limit=2, path=path)
+    assert [budget.reserve('youtube.videos.list') for _ in range(3)] == ['k1', 'k1', 'k2']
+    budget.mark_exhausted('k2')
+    with pytest.raises(scraper.QuotaExhaustedError):
+        budget.reserve('youtube.videos.list')
+
+    reloaded = scraper.QuotaBudget(['k1', 'k2'], daily_limit=200, path=path)
+    assert reloaded.units_used() == 4
+    assert reloaded.reserve('youtube.search.list') == 'k1'
+    assert reloaded.units_used() == 104
+
+def reserve_many(scraper, path, count):
+    budget = scraper.QuotaBudget(['k1'], daily_limit=10000, path=path)
+    for _ in range(count):
+        budget.reserve('youtube.videos.list')
+
+def test_overlapping_runs_share_one_budget(scraper, tmp_path):
+    path = str(tmp_path / 'quota.json')
+    first = scraper.QuotaBudget(['k1'], daily_limit=3, path=path)
+    second = scraper.QuotaBudget(['k1'], daily_limit=3, path=path)
+    first.reserve('youtube.videos.list')
+    second.reserve('youtube.videos.list')
+    first.reserve('youtube.videos.list')
+    with pytest.raises(scraper.QuotaExhaustedError):
+        second.reserve('youtube.videos.list')
+
+    context = multiprocessing.get_context('fork')
+    path = str(tmp_path / 'shared.json')
+    processes = [context.Process(target=reserve_many, args=(scraper, path, 50)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert scraper.QuotaBudget(['k1'], path=path).units_used() == 200
+
+def test_jobs_file_runs_every_source(stand_in, run_scraper, home, video_statuses, listed_video_ids):
+    server, base_url = stand_in
+    jobs_file = home / 'jobs.json'
+    jobs_file.write_text(json.dumps([{'url': 'https://www.youtube.com/@benchmark', 'folder': 'first'},
+                                     {'url': 'https://www.youtube.com/channel/UC1', 'folder': 'second'}]))
+    run_scraper(base_url, '--no-cache', '--jobs', str(jobs_file), '--parallel-sources', '2', folder='channel')
+    for folder in ['channel', 'first', 'second']:
+        assert sorted(video_statuses(folder)) == listed_video_ids(server.config)
+
+def test_quota_exhaustion_defers_source_until_next_run(stand_in, run_scraper, home, state_db, video_statuses,
+                                                       listed_video_ids):
+    server, base_url = stand_in
+    # channels.list, one playlistItems page and one videos.list use up 3 units.
+    summary = run_scraper(base_url, '--no-cache', '--daily-quota', '3', run_name='limited')
+    assert summary['counters']['quota_units'] == 3
+    assert sorted(video_statuses()) == listed_video_ids(server.config, count=50)
+    with state_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM syncs").fetchone()[0] == 0
+    with open(home / 'quota.json', 'r', encoding='utf-8') as file:
+        assert sum(json.load(file)['used'].values()) == 3
+
+    run_scraper(base_url, '--no-cache', '--daily-quota', '100', run_name='resumed')
+    assert sorted(video_statuses()) == listed_video_ids(server.config)
+
+def test_interrupt_stops_promptly_and_keeps_finished_videos(scraper, stand_in, run_scraper, argv_for, home,
+                                                            state_db, video_statuses, listed_video_ids):
+    server, base_url = stand_in
+    server.config.channel_size = 400
+    server.config.latency_ms = 40
+    process = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(scraper.__file__), 'yt-scraper.py'),
+                                *argv_for(base_url, '--no-cache', '--workers', '2')],
+                               env=dict(os.environ, HOME=str(home)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    def has_written():
+        try:
+            return bool(video_statuses())
+        except sqlite3.OperationalError:
+            # The state database exists but its tables aren't created yet.
+            return False
+
+    started = time.monotonic()
+    try:
+        while not (os.path.exists(os.path.join(scraper.get_output_path('channel'), scraper.STATE_DB_NAME))
+                   and has_written()):
+            assert process.poll() is None and time.monotonic() - started < 60
+            time.sleep(0.05)
+        process.send_signal(signal.SIGINT)
+        interrupted_at = time.monotonic()
+        process.wait(timeout=30)
+    finally:
+        process.kill()
+    assert time.monotonic() - interrupted_at < 3
+    assert process.returncode != 0
+    written = video_statuses()
+    assert 0 < len(written) < len(listed_video_ids(server.config))
+    with state_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM syncs").fetchone()[0] == 0
+
+    server.config.latency_ms = 0
+    run_scraper(base_url, '--no-cache', run_name='resumed')
+    assert sorted(video_statuses()) == listed_video_ids(server.config)
+
+def test_every_retry_is_charged_to_the_quota(scraper, tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper, 'thread_http', lambda: None)
+    monkeypatch.setattr(scraper.time, 'sleep', lambda seconds: None)
+    attempts = []
+
+    def execute(http=None):
+        attempts.append(request.uri)
+        if len(attempts) < 3:
+            error = Exception("Backend Error")
+            error.resp = SimpleNamespace(status=503)
+            raise error
+        return {'items': []}
+    request = SimpleNamespace(methodId='youtube.videos.list', uri='https://stand-in/youtube/v3/videos?id=a&key=old',
+                              headers={}, execute=execute)
+    budget = scraper.QuotaBudget(['k1'], daily_limit=100, path=str(tmp_path / 'quota.json'))
+    scraper.metrics.reset()
+    assert scraper.execute_request(request, budget=budget) == {'items': []}
+    assert len(attempts) == 3
+    assert all(uri.endswith('key=k1') for uri in attempts)
+    assert budget.units_used() == 3
+    assert scraper.metrics.summary()['counters']['quota_units'] == 3
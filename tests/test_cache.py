@@ -0,0 +1,82 @@
+import json
+import sqlite3
+
+import pytest
+
+def test_cache_evicts_least_recently_used_entries_at_the_size_limit(scraper, tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper.time, 'time', lambda: 1000.0)
+    (tmp_path / 'quota.json').write_text('{"day": "x", "used": {}}')
+    cache = scraper.ResponseCache(str(tmp_path), max_bytes=10 ** 9)
+    keys = [cache.make_key('youtube.videos.list', {'id': str(number)}) for number in range(4)]
+    for key in keys[:3]:
+        cache.put(key, 'youtube.videos.list', {'items': ['x' * 100]})
+    size = cache.entries[keys[0]]
+    assert cache.total_bytes == 3 * size
+
+    cache.max_bytes = 3 * size
+    assert cache.get(keys[0])['response'] == {'items': ['x' * 100]}
+    cache.put(keys[3], 'youtube.videos.list', {'items': ['y' * 100]})
+    assert list(cache.entries) == [keys[2], keys[0], keys[3]]
+    assert not (tmp_path / f"{keys[1]}.json").exists()
+    assert (tmp_path / 'quota.json').exists()
+
+    reloaded = scraper.ResponseCache(str(tmp_path), max_bytes=3 * size)
+    assert set(reloaded.entries) == {keys[0], keys[2], keys[3]}
+    assert reloaded.total_bytes == 3 * size
+
+def test_entries_expire_after_their_ttl(scraper, tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scraper.time, 'time', lambda: now[0])
+    cache = scraper.ResponseCache(str(tmp_path))
+    calls = []
+    fetch = lambda: calls.append(1) or {'items': len(calls)}
+    assert cache.fetch('youtube.playlistItems.list', {'page': 1}, fetch) == {'items': 1}
+    now[0] += scraper.CACHE_TTLS['youtube.playlistItems.list'] - 1
+    assert cache.fetch('youtube.playlistItems.list', {'page': 1}, fetch) == {'items': 1}
+    now[0] += 2
+    assert cache.fetch('youtube.playlistItems.list', {'page': 1}, fetch) == {'items': 2}
+
+def test_cached_missing_transcript_is_stale_online_but_replays_offline(scraper, tmp_path):
+    calls = []
+    cache = scraper.ResponseCache(str(tmp_path))
+    for _ in range(2):
+        assert cache.fetch('transcript', {'video_id': 'abc'}, lambda: calls.append(1)) is None
+    assert len(calls) == 2
+    offline = scraper.ResponseCache(str(tmp_path), offline=True)
+    assert offline.fetch('transcript', {'video_id': 'abc'}, lambda: calls.append(1)) is None
+    assert len(calls) == 2
+    with pytest.raises(scraper.CacheMissError):
+        offline.fetch('transcript', {'video_id': 'other'}, lambda: calls.append(1))
+
+def test_stale_api_responses_are_revalidated_with_their_etag(scraper, stand_in, tmp_path):
+    pytest.importorskip('googleapiclient')
+    server, base_url = stand_in
+    youtube = scraper.get_youtube_client('test', api_endpoint=base_url)
+    cache = scraper.ResponseCache(str(tmp_path))
+    first = scraper.execute_request(youtube.videos().list(part="snippet", id="vid00000001"), cache=cache)
+    path = next(tmp_path.glob('*.json'))
+    entry = json.loads(path.read_text())
+    assert entry['etag'] == first['etag']
+    entry['stored_at'] = 0
+    path.write_text(json.dumps(entry))
+
+    request = youtube.videos().list(part="snippet", id="vid00000001")
+    assert scraper.execute_request(request, cache=cache) == first
+    assert request.headers['If-None-Match'] == first['etag']
+    assert json.loads(path.read_text())['stored_at'] > 0
+
+def test_offline_replay_matches_online_run(stand_in, run_scraper, scraper, listed_video_ids):
+    server, base_url = stand_in
+    run_scraper(base_url, '--output', 'sqlite', folder='online', run_name='online')
+    server.shutdown()
+    run_scraper(base_url, '--output', 'sqlite', '--offline', folder='offline', run_name='offline')
+
+    def videos(folder):
+        with sqlite3.connect(f"{scraper.get_output_path(folder)}/videos.db") as conn:
+            return conn.execute("SELECT video_id, title, transcript, transcript_status FROM videos "
+                                "ORDER BY video_id").fetchall()
+    online, offline = videos('online'), videos('offline')
+    assert online == offline
+    assert [row[0] for row in offline] == listed_video_ids(server.config)
+    assert 'unavailable' in {row[3] for row in offline}
+    assert 'failed' not in {row[3] for row in offline}
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+class FakeYouTube:
+    # Records list() calls and answers them from canned responses, in order.
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def resource(self, name):
+        def list_(**kwargs):
+            self.calls.append((name, kwargs))
+            response = self.responses.pop(0)
+            return SimpleNamespace(methodId=f"youtube.{name}.list", execute=lambda http=None: response)
+        return lambda: SimpleNamespace(list=list_)
+
+    def __getattr__(self, name):
+        return self.resource(name)
+
+@pytest.fixture(autouse=True)
+def no_http(scraper, monkeypatch):
+    monkeypatch.setattr(scraper, 'thread_http', lambda: None)
+
+def playlist_page(published, next_page_token=None):
+    page = {'items': [{'contentDetails': {'videoId': f"vid{hour}", 'videoPublishedAt': f"2024-01-01T{hour:02d}:00:00Z"}}
+                      for hour in published]}
+    if next_page_token:
+        page['nextPageToken'] = next_page_token
+    return page
+
+@pytest.mark.parametrize('url, lookup', [
+    ('https://www.youtube.com/channel/UC123abc', {'id': 'UC123abc'}),
+    ('https://www.youtube.com/channel/UC123abc/videos?view=0', {'id': 'UC123abc'}),
+    ('https://www.youtube.com/@SomeHandle', {'forHandle': 'SomeHandle'}),
+    ('https://www.youtube.com/@SomeHandle/videos?view=0', {'forHandle': 'SomeHandle'}),
+])
+def test_get_channel_looks_up_ids_and_handles(scraper, url, lookup):
+    youtube = FakeYouTube([{'items': [{'id': 'UC123abc'}]}])
+    assert scraper.get_channel(youtube, url) == {'id': 'UC123abc'}
+    name, kwargs = youtube.calls[0]
+    assert name == 'channels'
+    assert {key: kwargs[key] for key in lookup} == lookup
+    assert not {'id', 'forHandle'} - set(lookup) & set(kwargs)
+
+@pytest.mark.parametrize('url, response', [
+    ('https://www.youtube.com/user/legacy', None),
+    ('https://www.youtube.com/@missing', {'items': []}),
+])
+def test_get_channel_rejects_unknown_channels(scraper, url, response):
+    with pytest.raises(ValueError):
+        scraper.get_channel(FakeYouTube([response]), url)
+
+def test_playlist_pages_are_fetched_lazily(scraper):
+    youtube = FakeYouTube([playlist_page([23, 22], 'page2'), playlist_page([21, 20])])
+    video_ids = scraper.iter_playlist_video_ids(youtube, 'UU1')
+    assert next(video_ids) == 'vid23'
+    assert len(youtube.calls) == 1
+    assert list(video_ids) == ['vid22', 'vid21', 'vid20']
+    assert youtube.calls[1][1]['pageToken'] == 'page2'
+
+def test_playlist_paging_stops_at_the_last_sync(scraper):
+    youtube = FakeYouTube([playlist_page([23, 22], 'page2'), playlist_page([21, 20], 'page3'),
+                           playlist_page([19, 18])])
+    video_ids = list(scraper.iter_playlist_video_ids(youtube, 'UU1', published_after="2024-01-01T21:00:00Z"))
+    assert video_ids == ['vid23', 'vid22']
+    assert len(youtube.calls) == 2
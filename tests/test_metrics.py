@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+def test_summary_reports_stage_timings_and_counters(scraper):
+    metrics = scraper.Metrics()
+    for seconds in [0.3, 0.1, 0.2]:
+        metrics.observe('transcript', seconds)
+    metrics.count('retries')
+    metrics.count('quota_units', 3)
+    summary = metrics.summary()
+    assert summary['stages']['transcript'] == {'count': 3, 'total_s': 0.6, 'p50_s': 0.2, 'p99_s': 0.3, 'max_s': 0.3}
+    assert summary['counters'] == {'retries': 1, 'quota_units': 3}
+
+@pytest.mark.parametrize('samples, pct, expected', [
+    (range(1, 7), 50, 3),
+    (range(1, 11), 50, 5),
+    (range(1, 101), 99, 99),
+    (range(1, 101), 100, 100),
+    (range(1, 2), 99, 1),
+    ([], 50, 0.0),
+])
+def test_percentile_uses_nearest_rank(scraper, samples, pct, expected):
+    assert scraper.percentile(list(samples), pct) == expected
+
+def test_stand_in_pages_and_honours_etags(stand_in):
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+    server, base_url = stand_in
+    url = f"{base_url}/youtube/v3/playlistItems?playlistId=UU&maxResults=50&pageToken=100"
+    with urlopen(url) as response:
+        page = json.load(response)
+    assert len(page['items']) == server.config.channel_size - 100
+    assert 'nextPageToken' not in page
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(Request(url, headers={'If-None-Match': page['etag']}))
+    assert excinfo.value.code == 304
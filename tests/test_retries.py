@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+from urllib.error import HTTPError
+
+import pytest
+
+@pytest.fixture
+def clock(scraper, monkeypatch):
+    # Fake monotonic clock that only advances when the code under test sleeps.
+    clock = SimpleNamespace(now=0.0, sleeps=[])
+
+    def sleep(seconds):
+        clock.sleeps.append(seconds)
+        clock.now += seconds
+    monkeypatch.setattr(scraper.time, 'monotonic', lambda: clock.now)
+    monkeypatch.setattr(scraper.time, 'sleep', sleep)
+    return clock
+
+def api_error(status):
+    error = Exception(f"HTTP {status}")
+    error.resp = SimpleNamespace(status=status)
+    return error
+
+def failing(errors, result='ok'):
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return func, calls
+
+@pytest.mark.parametrize('error, transient', [
+    (SimpleNamespace(resp=SimpleNamespace(status=503)), True),
+    (SimpleNamespace(resp=SimpleNamespace(status='429')), True),
+    (SimpleNamespace(resp=SimpleNamespace(status=403)), False),
+    (HTTPError('http://stand-in', 429, "Too Many Requests", {}, None), True),
+    (HTTPError('http://stand-in', 404, "Not Found", {}, None), False),
+    (type('TooManyRequests', (Exception,), {})(), True),
+    (ConnectionResetError(), True),
+    (ValueError("bad"), False),
+])
+def test_is_transient_error(scraper, error, transient):
+    assert scraper.is_transient_error(error) is transient
+
+def test_rate_limiter_bursts_to_capacity_then_spaces_requests(scraper, clock):
+    limiter = scraper.RateLimiter(rate=4, capacity=2)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.25), pytest.approx(0.25)]
+
+def test_rate_limiter_without_rate_never_waits(scraper, clock):
+    limiter = scraper.RateLimiter(rate=0)
+    for _ in range(100):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+def test_retries_transient_errors_with_capped_exponential_backoff(scraper, clock, monkeypatch):
+    monkeypatch.setattr(scraper.random, 'uniform', lambda low, high: high)
+    func, calls = failing([ConnectionResetError()] * 4)
+    assert scraper.call_with_retries(func, max_retries=5, base_delay=1.0, max_delay=5.0) == 'ok'
+    assert len(calls) == 5
+    assert clock.sleeps == [1.0, 2.0, 4.0, 5.0]
+
+def test_gives_up_after_max_retries(scraper, clock):
+    func, calls = failing([api_error(503)] * 10)
+    with pytest.raises(Exception) as excinfo:
+        scraper.call_with_retries(func, max_retries=3)
+    assert excinfo.value.resp.status == 503
+    assert len(calls) == 4
+
+def test_does_not_retry_permanent_errors(scraper, clock):
+    func, calls = failing([ValueError("bad request")])
+    with pytest.raises(ValueError):
+        scraper.call_with_retries(func, max_retries=5)
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+def test_every_attempt_waits_for_the_rate_limiter(scraper, clock, monkeypatch):
+    monkeypatch.setattr(scraper.random, 'uniform', lambda low, high: 0.0)
+    acquired = []
+    limiter = SimpleNamespace(acquire=lambda: acquired.append(1))
+    func, calls = failing([api_error(429), api_error(429)])
+    scraper.call_with_retries(func, max_retries=5, rate_limiter=limiter)
+    assert len(acquired) == len(calls) == 3
@@ -0,0 +1,26 @@
+def make_record(video_id, *texts):
+    return {'video_id': video_id, 'title': f"Title {video_id}", 'author': "Author",
+            'published_at': "2024-01-01T00:00:00Z", 'url': f"https://www.youtube.com/watch?v={video_id}",
+            'segments': [{'start': 30.0 * position + 0.5, 'duration': 5.0, 'text': text}
+                         for position, text in enumerate(texts)]}
+
+def test_reindexing_a_video_replaces_its_segments(scraper, tmp_path):
+    index = scraper.SearchIndex(str(tmp_path / 'index.db'))
+    index.write_batch([make_record('a', "intro", "machine learning basics", "more machine learning"),
+                       make_record('b', "cooking with machines")])
+    index.write_batch([make_record('c', "learning to cook", "machine learning in the kitchen")])
+    index.write_batch([make_record('a', "gardening tips", "the learning garden")])
+
+    results = index.search('machine learning')
+    assert [result['title'] for result in results] == ["Title c"]
+    assert results[0]['url'] == "https://www.youtube.com/watch?v=c&t=30s"
+    assert results[0]['start'] == 30.5
+    assert '[machine]' in results[0]['snippet']
+    assert [result['title'] for result in index.search('gardening')] == ["Title a"]
+    assert index.search('basics') == []
+
+    # One result per video, however many of its segments match.
+    assert sorted(result['title'] for result in index.search('learning')) == ["Title a", "Title c"]
+    assert len(index.search('learning', limit=1)) == 1
+    index.conn.execute("INSERT INTO segments_fts (segments_fts) VALUES ('integrity-check')")
+    index.close()
@@ -0,0 +1,95 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+@pytest.fixture
+def records(scraper):
+    records = []
+    for number in range(3):
+        video_info = {
+            'video_id': f"vid{number}", 'channel_id': 'UC1', 'author': "Author", 'title': f"Title {number}",
+            'published_at': f"2024-01-0{number + 1}T00:00:00Z", 'description': "Description",
+            'duration': 'PT1M5S', 'duration_seconds': 65, 'url': f"https://www.youtube.com/watch?v=vid{number}",
+        }
+        segments = [{'start': 0.0, 'duration': 2.0, 'text': "hello"}, {'start': 62.5, 'duration': 2.5, 'text': "world"}]
+        records.append(scraper.make_record(video_info, "hello world", segments))
+    return records
+
+@pytest.mark.parametrize('compression, filename, opener', [
+    (None, 'videos.jsonl', open),
+    ('gzip', 'videos.jsonl.gz', gzip.open),
+])
+def test_jsonl_sink_round_trip(scraper, tmp_path, records, compression, filename, opener):
+    sink = scraper.make_sink('jsonl', str(tmp_path), compression=compression)
+    sink.write_batch(records[:2])
+    sink.write_batch(records[2:])
+    sink.close()
+    with opener(tmp_path / filename, 'rt', encoding='utf-8') as file:
+        assert [json.loads(line) for line in file] == records
+
+def test_zstd_jsonl_sink_round_trip(scraper, tmp_path, records):
+    zstandard = pytest.importorskip('zstandard')
+    sink = scraper.make_sink('jsonl', str(tmp_path), compression='zstd')
+    sink.write_batch(records[:2])
+    sink.write_batch(records[2:])
+    sink.close()
+    with zstandard.open(tmp_path / 'videos.jsonl.zst', 'rt', encoding='utf-8') as file:
+        assert [json.loads(line) for line in file] == records
+
+def test_compression_needs_jsonl(scraper, tmp_path):
+    with pytest.raises(ValueError):
+        scraper.make_sink('sqlite', str(tmp_path), compression='gzip')
+
+def test_sqlite_sink_round_trip(scraper, tmp_path, records):
+    sink = scraper.make_sink('sqlite', str(tmp_path))
+    sink.write_batch(records)
+    sink.write_batch(records[:1])
+    sink.close()
+    columns = scraper.SqliteSink.COLUMNS
+    with sqlite3.connect(tmp_path / 'videos.db') as conn:
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM videos ORDER BY video_id").fetchall()
+        segments = conn.execute("SELECT start, duration, text FROM segments WHERE video_id = 'vid0'").fetchall()
+    assert rows == [tuple(record[column] for column in columns) for record in records]
+    assert segments == [(0.0, 2.0, "hello"), (62.5, 2.5, "world")]
+
+def test_text_sink_round_trip(scraper, tmp_path, records):
+    sink = scraper.make_sink('txt', str(tmp_path))
+    sink.write_batch(records[1:2])
+    sink.close()
+    assert (tmp_path / '2024-01-02 Title 1.txt').read_text(encoding='utf-8') == (
+        "Title: Title 1\n"
+        "Published At: 2024-01-02T00:00:00Z\n"
+        "URL: https://www.youtube.com/watch?v=vid1\n"
+        "Description: Description\n"
+        "Transcript: hello world\n"
+        "Segments:\n"
+        "[00:00:00] hello\n"
+        "[00:01:02] world\n"
+    )
+
+def test_retried_videos_are_appended_only_when_they_change(scraper, stand_in, run_scraper, video_statuses):
+    server, base_url = stand_in
+    path = f"{scraper.get_output_path('channel')}/videos.jsonl"
+    run_scraper(base_url, '--no-cache', '--output', 'jsonl', run_name='first')
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    unavailable = [video_id for video_id, status in video_statuses().items() if status == 'unavailable']
+    assert unavailable
+
+    for run in range(2):
+        summary = run_scraper(base_url, '--no-cache', '--output', 'jsonl', run_name=f"retry{run}")
+        assert summary['counters']['videos_unchanged'] == len(unavailable)
+        with open(path, 'r', encoding='utf-8') as file:
+            assert file.readlines() == lines
+
+    # Once a transcript shows up, the retried video is written again.
+    server.config.unavailable_rate = 0
+    summary = run_scraper(base_url, '--no-cache', '--output', 'jsonl', run_name='recovered')
+    assert summary['counters']['videos_written'] == len(unavailable)
+    with open(path, 'r', encoding='utf-8') as file:
+        appended = [json.loads(line) for line in file.readlines()[len(lines):]]
+    assert sorted(record['video_id'] for record in appended) == sorted(unavailable)
+    assert {record['transcript_status'] for record in appended} == {'done'}
+    assert set(video_statuses().values()) == {'done'}
@@ -0,0 +1,16 @@
+import json
+
+import pytest
+
+def test_client_is_built_once_per_key_and_endpoint(scraper):
+    pytest.importorskip('googleapiclient')
+    client = scraper.get_youtube_client('test', api_endpoint='http://127.0.0.1:9')
+    assert scraper.get_youtube_client('test', api_endpoint='http://127.0.0.1:9') is client
+    assert scraper.get_youtube_client('other', api_endpoint='http://127.0.0.1:9') is not client
+
+def test_offline_startup_needs_no_key_or_network(scraper, home, argv_for):
+    pytest.importorskip('googleapiclient')
+    scraper.main(argv_for('http://127.0.0.1:9', '--offline', '--startup-only'))
+    with open(home / 'metrics.json', 'r', encoding='utf-8') as file:
+        assert json.load(file)['stages']['startup']['count'] == 1
+    assert [path.name for path in (home / 'cache').iterdir()] == []
@@ -0,0 +1,35 @@
+def test_pending_video_ids_skips_finished_and_retries_the_rest_last(scraper, tmp_path):
+    state = scraper.StateStore(str(tmp_path))
+    state.record_videos([('a', '2024-01-01T00:00:00Z', 'done', 'a.txt', None),
+                         ('b', '2024-01-02T00:00:00Z', 'unavailable', 'b.txt', None),
+                         ('c', '2024-01-03T00:00:00Z', 'failed', None, None)])
+    assert list(scraper.pending_video_ids(['d', 'a', 'c', 'e'], state)) == ['d', 'c', 'e', 'b']
+    state.close()
+
+def test_rerun_skips_finished_videos_and_retries_the_rest(stand_in, run_scraper, listed_video_ids, state_db, video_statuses):
+    server, base_url = stand_in
+    run_scraper(base_url, '--no-cache', run_name='first')
+    statuses = video_statuses()
+    unavailable = [video_id for video_id, status in statuses.items() if status == 'unavailable']
+    assert sorted(statuses) == listed_video_ids(server.config)
+    assert unavailable and set(statuses.values()) == {'done', 'unavailable'}
+
+    # Simulate a crash: ten finished videos and the sync point were never recorded.
+    forgotten = [video_id for video_id, status in statuses.items() if status == 'done'][:10]
+    with state_db() as conn:
+        conn.executemany("DELETE FROM videos WHERE video_id = ?", [(video_id,) for video_id in forgotten])
+        conn.execute("DELETE FROM syncs")
+    summary = run_scraper(base_url, '--no-cache', run_name='resume')
+    assert summary['counters']['videos_written'] == len(forgotten) + len(unavailable)
+    assert video_statuses() == statuses
+
+    # With a sync point, paging stops at the first page and only earlier failures are retried.
+    summary = run_scraper(base_url, '--no-cache', run_name='incremental')
+    assert summary['counters']['videos_written'] == len(unavailable)
+    assert summary['stages']['enumerate']['count'] == 2
+
+def test_full_run_ignores_the_sync_state(stand_in, run_scraper, listed_video_ids):
+    server, base_url = stand_in
+    run_scraper(base_url, '--no-cache', run_name='first')
+    summary = run_scraper(base_url, '--no-cache', '--full', run_name='full')
+    assert summary['counters']['videos_written'] == len(listed_video_ids(server.config))
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import resource
+import tempfile
+import subprocess
+import logging
+import importlib.util
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SCRAPER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yt-scraper.py')
+CHANNEL_ID = 'UCbenchmarkchannel0000'
+UPLOADS_PLAYLIST_ID = 'UUbenchmarkchannel0000'
+NEWEST_UPLOAD = datetime(2024, 1, 1)
+
+def video_id_for(number):
+    return f"vid{number:08d}"
+
+def video_number(video_id):
+    return int(video_id[3:])
+
+def is_unlucky(video_id, salt, rate):
+    digest = hashlib.sha256(f"{salt}:{video_id}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') / 2 ** 32 < rate
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Serves just enough of the YouTube Data API v3 (channels, playlistItems, videos,
+    # search) and a JSON transcript endpoint for the scraper to run end to end.
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        config = self.server.config
+        url = urlsplit(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        time.sleep(max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000)
+        is_transcript = url.path.startswith('/transcript/')
+        if random.random() < config.error_rate:
+            status = 429 if is_transcript else 503
+            return self.send_json({'error': {'code': status, 'message': "Injected stand-in error"}}, status)
+        if is_transcript:
+            return self.send_transcript(url.path.rsplit('/', 1)[1])
+        routes = {
+            '/youtube/v3/channels': self.channels,
+            '/youtube/v3/playlistItems': self.playlist_items,
+            '/youtube/v3/videos': self.videos,
+            '/youtube/v3/search': self.search,
+        }
+        if url.path not in routes:
+            return self.send_json({'error': {'code': 404, 'message': f"Unknown path {url.path}"}}, 404)
+        self.send_json(routes[url.path](params))
+
+    def send_json(self, body, status=200):
+        payload = json.dumps(body).encode('utf-8')
+        etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+        if status == 200 and isinstance(body, dict):
+            body['etag'] = etag
+            payload = json.dumps(body).encode('utf-8')
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def page(self, params, total):
+        start = int(params.get('pageToken') or 0)
+        end = min(total, start + int(params.get('maxResults') or 5))
+        next_page = {'nextPageToken': str(end)} if end < total else {}
+        return range(start, end), next_page
+
+    def channels(self, params):
+        return {'items': [{
+            'id': CHANNEL_ID,
+            'statistics': {'videoCount': str(self.server.config.channel_size)},
+            'contentDetails': {'relatedPlaylists': {'uploads': UPLOADS_PLAYLIST_ID}},
+        }]}
+
+    def playlist_items(self, params):
+        numbers, next_page = self.page(params, self.server.config.channel_size)
+        return dict(next_page, items=[{
+            'contentDetails': {
+                'videoId': video_id_for(number),
+                'videoPublishedAt': self.published_at(number),
+            },
+        } for number in numbers])
+
+    def search(self, params):
+        numbers, next_page = self.page(params, self.server.config.channel_size)
+        return dict(next_page, items=[{'id': {'kind': 'youtube#video', 'videoId': video_id_for(number)}}
+                                      for number in numbers])
+
+    def videos(self, params):
+        config = self.server.config
+        items = []
+        for video_id in params.get('id', '').split(','):
+            if not video_id or is_unlucky(video_id, 'private', config.private_rate):
+                continue
+            number = video_number(video_id)
+            items.append({
+                'id': video_id,
+                'snippet': {
+                    'channelId': CHANNEL_ID,
+                    'channelTitle': "Benchmark Channel",
+                    'title': f"Benchmark video {number}",
+                    'publishedAt': self.published_at(number),
+                    'description': f"Stand-in description for video {number}. " * 4,
+                },
+                'contentDetails': {'duration': f"PT{config.segments * 5 // 60}M{config.segments * 5 % 60}S"},
+            })
+        return {'items': items}
+
+    def send_transcript(self, video_id):
+        config = self.server.config
+        if is_unlucky(video_id, 'transcript', config.unavailable_rate):
+            return self.send_json({'error': {'code': 404, 'message': "No transcript"}}, 404)
+        words = ["benchmark", "stand-in", "transcript", "segment", "youtube", "scraper", "latency", "quota"]
+        segments = [{'start': i * 5.0, 'duration': 5.0,
+                     'text': ' '.join(words[(video_number(video_id) + i + j) % len(words)] for j in range(8))}
+                    for i in range(config.segments)]
+        self.send_json(segments)
+
+    def published_at(self, number):
+        return (NEWEST_UPLOAD - timedelta(hours=number)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def make_server(config, port=0):
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+    server.daemon_threads = True
+    server.config = config
+    return server
+
+def serve(config):
+    server = make_server(config, config.port)
+    # The parent benchmark process reads this line to learn the port.
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    server.serve_forever()
+
+def start_stand_in(config):
+    # The stand-in runs in its own process so its CPU and memory don't count against the
+    # scraper being measured.
+    command = [sys.executable, os.path.abspath(__file__), 'serve',
+               '--channel-size', str(config.channel_size),
+               '--latency-ms', str(config.latency_ms),
+               '--jitter-ms', str(config.jitter_ms),
+               '--error-rate', str(config.error_rate),
+               '--private-rate', str(config.private_rate),
+               '--unavailable-rate', str(config.unavailable_rate),
+               '--segments', str(config.segments)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+def load_scraper():
+    spec = importlib.util.spec_from_file_location('yt_scraper', SCRAPER_PATH)
+    scraper = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(scraper)
+    return scraper
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_benchmark(scraper, base_url, workers, config):
+    original_home = os.environ.get('HOME')
+    with tempfile.TemporaryDirectory(prefix='yt-bench-') as work_dir:
+        metrics_file = os.path.join(work_dir, 'metrics.json')
+        os.environ['HOME'] = work_dir
+        argv = ['--source', 'https://www.youtube.com/@benchmark', 'benchmark',
+                '--api-endpoint', base_url,
+                '--transcript-endpoint', f"{base_url}/transcript",
+                '--api-key', 'benchmark',
+                '--quota-file', os.path.join(work_dir, 'quota.json'),
+                '--cache-dir', os.path.join(work_dir, 'cache'),
+                '--index', os.path.join(work_dir, 'index.db'),
+                '--metrics-file', metrics_file,
+                '--workers', str(workers),
+                '--rate-limit', str(config.rate_limit),
+                '--output', config.output]
+        if not config.with_cache:
+            argv.append('--no-cache')
+        try:
+            started = time.perf_counter()
+            scraper.main(argv)
+            elapsed = time.perf_counter() - started
+        finally:
+            if original_home is None:
+                os.environ.pop('HOME', None)
+            else:
+                os.environ['HOME'] = original_home
+        with open(metrics_file, 'r', encoding='utf-8') as file:
+            summary = json.load(file)
+    videos = summary['counters'].get('videos_processed', 0)
+    video_stage = summary['stages'].get('video', {})
+    return {
+        'workers': workers,
+        'videos': videos,
+        'elapsed_s': round(elapsed, 3),
+        'videos_per_s': round(videos / elapsed, 2) if elapsed else 0.0,
+        'p50_video_latency_ms': round(video_stage.get('p50_s', 0) * 1000, 1),
+        'p99_video_latency_ms': round(video_stage.get('p99_s', 0) * 1000, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'quota_units': summary['counters'].get('quota_units', 0),
+        'retries': summary['counters'].get('retries', 0),
+        'stages': summary['stages'],
+    }
+
+def run_one(config):
+    # Runs a single worker count in this process and prints its result as JSON, so the
+    # peak RSS belongs to this run alone.
+    logging.getLogger().setLevel(logging.WARNING)
+    print(json.dumps(run_benchmark(load_scraper(), config.base_url, config.workers, config)), flush=True)
+
+def bench(config):
+    process, base_url = start_stand_in(config)
+    results = []
+    try:
+        for workers in config.workers:
+            command = [sys.executable, os.path.abspath(__file__), 'run',
+                       '--base-url', base_url,
+                       '--workers', str(workers),
+                       '--rate-limit', str(config.rate_limit),
+                       '--output', config.output]
+            if config.with_cache:
+                command.append('--with-cache')
+            output = subprocess.run(command, stdout=subprocess.PIPE, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        process.terminate()
+        process.wait()
+    if config.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'workers':>7} {'videos':>7} {'elapsed s':>10} {'videos/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'peak RSS MB':>12} {'quota':>6} {'retries':>8}")
+    for result in results:
+        print(f"{result['workers']:>7} {result['videos']:>7} {result['elapsed_s']:>10} {result['videos_per_s']:>9} "
+              f"{result['p50_video_latency_ms']:>8} {result['p99_video_latency_ms']:>8} "
+              f"{result['peak_rss_mb']:>12} {result['quota_units']:>6} {result['retries']:>8}")
+
+def add_scraper_args(parser):
+    parser.add_argument('--rate-limit', type=float, default=0, help="Scraper --rate-limit (default: 0, off).")
+    parser.add_argument('--output', choices=['txt', 'jsonl', 'sqlite'], default='jsonl',
+                        help="Scraper output format (default: jsonl).")
+    parser.add_argument('--with-cache', action='store_true',
+                        help="Run the scraper with its response cache (off by default so every run hits the stand-in).")
+
+def add_stand_in_args(parser):
+    parser.add_argument('--channel-size', type=int, default=500, help="Videos in the stand-in channel (default: 500).")
+    parser.add_argument('--latency-ms', type=float, default=50, help="Mean response latency (default: 50).")
+    parser.add_argument('--jitter-ms', type=float, default=10, help="Latency standard deviation (default: 10).")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with 503 (API) or 429 (transcripts).")
+    parser.add_argument('--private-rate', type=float, default=0.01,
+                        help="Fraction of videos missing from videos.list (default: 0.01).")
+    parser.add_argument('--unavailable-rate', type=float, default=0.05,
+                        help="Fraction of videos without a transcript (default: 0.05).")
+    parser.add_argument('--segments', type=int, default=200, help="Transcript segments per video (default: 200).")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark yt-scraper against a local YouTube API stand-in.")
+    subparsers = parser.add_subparsers(dest='command')
+    serve_parser = subparsers.add_parser('serve', help="Only run the stand-in server.")
+    add_stand_in_args(serve_parser)
+    serve_parser.add_argument('--port', type=int, default=0, help="Port to listen on (default: any free port).")
+    run_parser = subparsers.add_parser('run', help="Benchmark one worker count against a running stand-in.")
+    run_parser.add_argument('--base-url', required=True, help="Stand-in URL printed by 'serve'.")
+    run_parser.add_argument('--workers', type=int, default=4, help="Scraper worker count (default: 4).")
+    add_scraper_args(run_parser)
+    add_stand_in_args(parser)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16],
+                        help="Worker counts to benchmark, each in its own process (default: 1 4 16).")
+    add_scraper_args(parser)
+    parser.add_argument('--json', action='store_true', help="Print full results, including stage timings, as JSON.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'serve':
+        serve(args)
+    elif args.command == 'run':
+        run_one(args)
+    else:
+        bench(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,537 @@
 #!/usr/bin/env python3
 
+import time
+
+STARTED_AT = time.perf_counter()
+
 import os
 import sys
+import math
+import random
+import argparse
+import threading
 import subprocess
+import re
+import json
+import sqlite3
+import hashlib
 import logging
-from datetime import datetime
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 __version__ = "1.2"
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def verify_virtualenv():
-    logging.info(f"VIRTUAL_ENV before sourcing: {os.getenv('VIRTUAL_ENV')}")
-    if not os.getenv('VIRTUAL_ENV'):
-        logging.info("Virtual environment is not activated. Attempting to activate it...")
-        activate_script = os.path.join(os.path.dirname(__file__), 'venv', 'bin', 'activate')
-        if os.path.exists(activate_script):
-            command = f"source {activate_script} && exec {sys.executable} {' '.join(sys.argv)}"
-            subprocess.run(command, shell=True, executable='/bin/zsh')
-            sys.exit(0)
-        else:
-            logging.error(f"Activate script not found at {activate_script}")
-            sys.exit(1)
-    logging.info("Verifying virtual environment...")
+REQUIRED_PACKAGES = {
+    'googleapiclient': 'google-api-python-client',
+    'youtube_transcript_api': 'youtube-transcript-api',
+}
 
-def install_missing_modules(required_modules):
+def install_missing_modules(required_packages):
+    import importlib.util
     logging.info("Checking dependencies...")
-    for module in required_modules:
-        try:
-            __import__(module)
-        except ImportError:
+    for module, package in required_packages.items():
+        if importlib.util.find_spec(module) is None:
             logging.info(f"Installing missing module: {module}")
             try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", module])
-                logging.info(f"Successfully installed {module}")
+                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+                logging.info(f"Successfully installed {package}")
             except subprocess.CalledProcessError as e:
-                logging.error(f"Failed to install {module}: {e}")
+                logging.error(f"Failed to install {package}: {e}")
                 sys.exit(1)
 
-def get_youtube_api_key():
+youtube_clients = {}
+
+def get_youtube_client(api_key, api_endpoint=None):
+    # One client per key per process, so in-process re-runs (e.g. benchmarks) skip
+    # building it again.
+    if (api_key, api_endpoint) not in youtube_clients:
+        from googleapiclient.discovery import build
+        client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+        youtube_clients[(api_key, api_endpoint)] = build('youtube', 'v3', developerKey=api_key,
+                                                         client_options=client_options)
+    return youtube_clients[(api_key, api_endpoint)]
+
+class Metrics:
+    # Process-wide stage timings and counters; main() emits summary() as JSON at the
+    # end of every run.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.perf_counter()
+            self.stages = {}
+            self.counters = {}
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.stages.setdefault(stage, []).append(seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        with self.lock:
+            stages = {}
+            for stage, samples in self.stages.items():
+                ordered = sorted(samples)
+                stages[stage] = {
+                    'count': len(ordered),
+                    'total_s': round(sum(ordered), 4),
+                    'p50_s': round(percentile(ordered, 50), 4),
+                    'p99_s': round(percentile(ordered, 99), 4),
+                    'max_s': round(ordered[-1], 4),
+                }
+            return {
+                'elapsed_s': round(time.perf_counter() - self.started_at, 4),
+                'stages': stages,
+                'counters': dict(self.counters),
+            }
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    # Nearest-rank: the smallest value with at least `pct` percent of samples at or below it.
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+metrics = Metrics()
+
+TRANSIENT_HTTP_STATUSES = {429, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = {'TooManyRequests', 'RequestBlocked', 'IpBlocked'}
+
+class RateLimiter:
+    # Token bucket shared by all workers: `rate` tokens per second, bursting up to `capacity`.
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def is_transient_error(error):
+    from urllib.error import HTTPError
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is None and isinstance(error, HTTPError):
+        status = error.code
+    if status is not None:
+        return int(status) in TRANSIENT_HTTP_STATUSES
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    return isinstance(error, OSError)
+
+# Set when the run is interrupted (Ctrl-C): sources stop submitting videos, in-flight
+# requests stop retrying, and whatever is already downloaded is still written.
+stop_requested = threading.Event()
+
+def call_with_retries(func, *args, max_retries=5, base_delay=1.0, max_delay=60.0, rate_limiter=None, **kwargs):
+    attempt = 0
+    while True:
+        if rate_limiter:
+            rate_limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_retries or stop_requested.is_set() or not is_transient_error(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            attempt += 1
+            metrics.count('retries')
+            logging.warning(f"Transient error ({e}); retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+QUOTA_COSTS = {
+    'youtube.search.list': 100,
+}
+DEFAULT_QUOTA_COST = 1
+
+class QuotaExhaustedError(Exception):
+    pass
+
+def quota_timezone():
+    # YouTube Data API quotas reset at midnight Pacific time.
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo('America/Los_Angeles')
+    except Exception:
+        return timezone(timedelta(hours=-8))
+
+class QuotaBudget:
+    # Daily quota units per API key, persisted so that separate runs (e.g. cron) share
+    # one budget. Keys are used in order and rotated once one runs out; when all are
+    # spent, reserve() either waits for the reset or raises QuotaExhaustedError.
+    def __init__(self, api_keys, daily_limit=10000, path=None, wait=False):
+        self.api_keys = list(api_keys)
+        self.daily_limit = daily_limit
+        self.path = path
+        self.wait = wait
+        self.lock = threading.Lock()
+        self.day = self.current_day()
+        self.load()
+
+    def load(self):
+        self.used = {}
+        if self.path and os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            if saved.get('day') == self.day:
+                self.used = saved.get('used', {})
+
+    def current_day(self):
+        return datetime.now(quota_timezone()).strftime("%Y-%m-%d")
+
+    def seconds_until_reset(self):
+        now = datetime.now(quota_timezone())
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - now).total_seconds()
+
+    def key_id(self, api_key):
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+    @contextmanager
+    def shared_usage(self):
+        # Re-reads the file under an exclusive lock and saves on the way out, so runs
+        # that overlap add to each other's counts instead of overwriting them.
+        if not self.path:
+            yield
+            return
+        import fcntl
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.load()
+            yield
+            self.save()
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'day': self.day, 'used': self.used}, file)
+        os.replace(tmp_path, self.path)
+
+    def units_used(self):
+        with self.lock:
+            return sum(self.used.values())
+
+    def reserve(self, endpoint):
+        cost = QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST)
+        while True:
+            with self.lock:
+                if self.current_day() != self.day:
+                    self.day = self.current_day()
+                    self.used = {}
+                with self.shared_usage():
+                    for api_key in self.api_keys:
+                        key_id = self.key_id(api_key)
+                        if self.used.get(key_id, 0) + cost <= self.daily_limit:
+                            self.used[key_id] = self.used.get(key_id, 0) + cost
+                            return api_key
+                delay = self.seconds_until_reset()
+            if not self.wait:
+                raise QuotaExhaustedError(f"Daily quota of {self.daily_limit} units is spent for all "
+                                          f"{len(self.api_keys)} API keys; it resets in {delay / 3600:.1f}h.")
+            logging.warning(f"Daily quota spent for all API keys; pausing {delay / 3600:.1f}h until it resets.")
+            time.sleep(min(delay + 1, 600))
+
+    def mark_exhausted(self, api_key):
+        with self.lock, self.shared_usage():
+            self.used[self.key_id(api_key)] = self.daily_limit
+
+def is_quota_error(error):
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    content = getattr(error, 'content', b'') or b''
+    return status == 403 and (b'quotaExceeded' in content or b'dailyLimitExceeded' in content)
+
+def use_api_key(request, api_key):
+    parts = urlsplit(request.uri)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name != 'key'] + [('key', api_key)]
+    request.uri = urlunsplit(parts._replace(query=urlencode(query)))
+
+thread_local = threading.local()
+
+def thread_http():
+    # httplib2 connections are not thread-safe, so each thread executes API requests
+    # on its own.
+    if not hasattr(thread_local, 'http'):
+        from googleapiclient.http import build_http
+        thread_local.http = build_http()
+    return thread_local.http
+
+CACHE_TTLS = {
+    'youtube.channels.list': 24 * 3600,
+    'youtube.playlistItems.list': 3600,
+    'youtube.videos.list': 7 * 24 * 3600,
+    'transcript': 30 * 24 * 3600,
+}
+DEFAULT_CACHE_TTL = 3600
+
+CACHE_FILE_NAME = re.compile(r'[0-9a-f]{64}\.json')
+
+class CacheMissError(Exception):
+    pass
+
+class ResponseCache:
+    # Content-addressed JSON store: each entry lives at <sha256 of endpoint+params>.json
+    # and is evicted least-recently-used once the directory exceeds `max_bytes`.
+    # In offline mode entries never expire and misses raise CacheMissError.
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, offline=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        # Only files named like cache keys are managed, so anything else kept in the
+        # directory is never indexed or evicted.
+        files = [entry for entry in os.scandir(cache_dir) if CACHE_FILE_NAME.fullmatch(entry.name)]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            self.entries[entry.name[:-5]] = entry.stat().st_size
+            self.total_bytes += entry.stat().st_size
+
+    def make_key(self, endpoint, params):
+        identity = json.dumps([endpoint, sorted(params.items())], sort_keys=True)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        try:
+            with open(self.path_for(key), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+            os.utime(self.path_for(key))
+            return entry
+        except (OSError, ValueError):
+            self.discard(key)
+            return None
+
+    def put(self, key, endpoint, response, etag=None, negative=False):
+        entry = {'endpoint': endpoint, 'stored_at': time.time(), 'etag': etag, 'response': response,
+                 'negative': negative}
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_key, old_size = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+                try:
+                    os.remove(self.path_for(old_key))
+                except OSError:
+                    pass
+
+    def discard(self, key):
+        with self.lock:
+            self.total_bytes -= self.entries.pop(key, 0)
+
+    def is_fresh(self, entry):
+        # Negative results (e.g. no transcript yet) only replay offline; online runs
+        # always ask again.
+        if entry.get('negative') and not self.offline:
+            return False
+        ttl = CACHE_TTLS.get(entry['endpoint'], DEFAULT_CACHE_TTL)
+        return self.offline or time.time() - entry['stored_at'] < ttl
+
+    def fetch(self, endpoint, params, func):
+        key = self.make_key(endpoint, params)
+        entry = self.get(key)
+        if entry and self.is_fresh(entry):
+            return entry['response']
+        if self.offline:
+            raise CacheMissError(f"{endpoint} {params} is not cached (offline mode)")
+        response = func()
+        self.put(key, endpoint, response, negative=response is None)
+        return response
+
+def request_cache_params(request):
+    # The API key is dropped so rotated or replaced keys still share cache entries.
+    query = [(name, value) for name, value in parse_qsl(urlsplit(request.uri).query) if name != 'key']
+    return {'uri': urlsplit(request.uri).path, 'query': urlencode(sorted(query))}
+
+def execute_request(request, cache=None, rate_limiter=None, max_retries=5, budget=None):
+    endpoint = getattr(request, 'methodId', None) or urlsplit(request.uri).path
+    entry = None
+    if cache:
+        params = request_cache_params(request)
+        key = cache.make_key(endpoint, params)
+        entry = cache.get(key)
+        if entry and cache.is_fresh(entry):
+            metrics.count('cache_hits')
+            return entry['response']
+        if cache.offline:
+            raise CacheMissError(f"{endpoint} {params['query']} is not cached (offline mode)")
+        if entry and entry.get('etag'):
+            request.headers['If-None-Match'] = entry['etag']
+    api_key = None
+
+    def attempt():
+        # Every attempt, retries included, is charged against the quota.
+        nonlocal api_key
+        if budget:
+            api_key = budget.reserve(endpoint)
+            use_api_key(request, api_key)
+        metrics.count('api_requests')
+        metrics.count('quota_units', QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST))
+        return request.execute(http=thread_http())
+
+    while True:
+        try:
+            response = call_with_retries(attempt, max_retries=max_retries, rate_limiter=rate_limiter)
+            break
+        except Exception as e:
+            if entry and getattr(getattr(e, 'resp', None), 'status', None) == 304:
+                cache.put(key, endpoint, entry['response'], etag=entry['etag'])
+                return entry['response']
+            if budget and is_quota_error(e):
+                logging.warning("API key quota exceeded; rotating to the next key.")
+                budget.mark_exhausted(api_key)
+                continue
+            raise
+    if cache:
+        cache.put(key, endpoint, response, etag=response.get('etag'))
+    return response
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), "Downloads", ".yt-scraper-index.db")
+STATE_DB_NAME = '.yt-scraper-state.db'
+TRANSCRIPT_UNAVAILABLE = "Transcript not available."
+TRANSCRIPT_ERROR_PREFIX = "Error getting transcript"
+
+class StateStore:
+    # Per-folder SQLite record of processed videos and channel sync points, used to
+    # skip finished work on re-runs and to resume after a crash.
+    def __init__(self, folder_path):
+        os.makedirs(folder_path, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(folder_path, STATE_DB_NAME))
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                published_at TEXT,
+                status TEXT NOT NULL,
+                output_path TEXT,
+                transcript_hash TEXT,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS syncs (
+                source_id TEXT PRIMARY KEY,
+                last_published_at TEXT,
+                synced_at TEXT NOT NULL
+            );
+        ''')
+
+    def finished_video_ids(self):
+        return {row[0] for row in self.conn.execute("SELECT video_id FROM videos WHERE status = 'done'")}
+
+    def retry_video_ids(self):
+        return [row[0] for row in self.conn.execute(
+            "SELECT video_id FROM videos WHERE status != 'done' ORDER BY published_at")]
+
+    def retried_versions(self, video_ids):
+        # (status, transcript_hash) of videos already written but not finished.
+        placeholders = ', '.join('?' for _ in video_ids)
+        return {video_id: (status, transcript_hash) for video_id, status, transcript_hash in self.conn.execute(
+            f"SELECT video_id, status, transcript_hash FROM videos WHERE status != 'done' AND video_id IN ({placeholders})",
+            video_ids)}
+
+    def record_videos(self, videos):
+        updated_at = datetime.now(timezone.utc).isoformat()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO videos (video_id, published_at, status, output_path, transcript_hash, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(video_id, published_at, status, output_path, transcript_hash, updated_at)
+             for video_id, published_at, status, output_path, transcript_hash in videos])
+        self.conn.commit()
+
+    def last_sync(self, source_id):
+        row = self.conn.execute("SELECT last_published_at FROM syncs WHERE source_id = ?", (source_id,)).fetchone()
+        return row[0] if row else None
+
+    def record_sync(self, source_id, last_published_at):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO syncs (source_id, last_published_at, synced_at) VALUES (?, ?, ?)",
+            (source_id, last_published_at, datetime.now(timezone.utc).isoformat()))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def get_youtube_api_keys(api_keys=None, interactive=True):
+    if api_keys:
+        return api_keys
+    if os.getenv('YOUTUBE_API_KEYS'):
+        return [api_key.strip() for api_key in os.getenv('YOUTUBE_API_KEYS').split(',') if api_key.strip()]
     api_key_file = '.yt_api_key'
     if os.path.exists(api_key_file):
         with open(api_key_file, 'r') as file:
-            return file.read().strip()
-    else:
-        api_key = input("Enter your YouTube API key: ").strip()
-        with open(api_key_file, 'w') as file:
-            file.write(api_key)
-        return api_key
+            return [line.strip() for line in file if line.strip()]
+    if not interactive:
+        raise ValueError("No YouTube API key: pass --api-key, set YOUTUBE_API_KEYS or create .yt_api_key.")
+    api_key = input("Enter your YouTube API key: ").strip()
+    with open(api_key_file, 'w') as file:
+        file.write(api_key)
+    return [api_key]
 
-def get_channel_id(youtube, channel_url):
-    if '@' not in channel_url:
+def get_channel(youtube, channel_url, cache=None, budget=None):
+    if '/channel/' in channel_url:
+        lookup = {'id': channel_url.split('/channel/')[1].split('/')[0].split('?')[0]}
+    elif '@' in channel_url:
+        lookup = {'forHandle': channel_url.split('@')[1].split('/')[0].split('?')[0]}
+    else:
         raise ValueError("Invalid YouTube channel URL format.")
-    channel_handle = channel_url.split('@')[1].split('/')[0]
-    request = youtube.search().list(part="snippet", q=channel_handle, type="channel")
-    response = request.execute()
-    if not response['items']:
-        raise ValueError("Could not find channel ID using the provided handle.")
-    return response['items'][0]['snippet']['channelId']
+    request = youtube.channels().list(part="contentDetails,statistics", **lookup)
+    with metrics.timer('enumerate'):
+        response = execute_request(request, cache=cache, budget=budget)
+    if not response.get('items'):
+        raise ValueError("Could not find a channel for the provided URL.")
+    return response['items'][0]
 
 def get_playlist_id(playlist_url):
     if 'list=' not in playlist_url:
         raise ValueError("Invalid YouTube playlist URL format.")
     return playlist_url.split('list=')[1]
 
-def get_playlist_video_ids(youtube, playlist_id):
-    video_ids = []
+def iter_playlist_video_ids(youtube, playlist_id, published_after=None, cache=None, budget=None):
+    # Yields page by page so processing can start before later pages are fetched.
+    # Uploads playlists are newest-first, so paging stops at the first page that
+    # reaches videos published at or before `published_after`.
     next_page_token = None
     while True:
         request = youtube.playlistItems().list(
@@ -74,129 +540,729 @@ def get_playlist_video_ids(youtube, playlist_id):
             maxResults=50,
             pageToken=next_page_token
         )
-        response = request.execute()
-        video_ids.extend([item['contentDetails']['videoId'] for item in response['items']])
+        with metrics.timer('enumerate'):
+            response = execute_request(request, cache=cache, budget=budget)
+        reached_synced = False
+        for item in response['items']:
+            published_at = item['contentDetails'].get('videoPublishedAt')
+            if published_after and published_at and published_at <= published_after:
+                reached_synced = True
+                continue
+            yield item['contentDetails']['videoId']
         next_page_token = response.get('nextPageToken')
-        if not next_page_token:
+        if not next_page_token or reached_synced:
             break
-    return video_ids
 
-def get_video_details(youtube, video_id):
-    request = youtube.videos().list(part="snippet,contentDetails", id=video_id)
-    response = request.execute()
-    if not response['items']:
+def get_playlist_video_ids(youtube, playlist_id, cache=None, budget=None):
+    return list(iter_playlist_video_ids(youtube, playlist_id, cache=cache, budget=budget))
+
+VIDEOS_LIST_MAX_IDS = 50
+
+def chunked(items, size):
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+ISO8601_DURATION = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+def parse_duration(duration):
+    match = ISO8601_DURATION.fullmatch(duration or '')
+    if not match:
         return None
-    video_info = response['items'][0]['snippet']
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+def format_video_details(item):
+    video_info = item['snippet']
+    duration = item.get('contentDetails', {}).get('duration')
     return {
+        'video_id': item['id'],
+        'channel_id': video_info.get('channelId'),
         'author': video_info['channelTitle'],
         'title': video_info['title'],
         'published_at': video_info['publishedAt'],
         'description': video_info['description'],
-        'url': f"https://www.youtube.com/watch?v={video_id}"
+        'duration': duration,
+        'duration_seconds': parse_duration(duration),
+        'url': f"https://www.youtube.com/watch?v={item['id']}"
     }
 
-def get_video_transcript(video_id):
+def get_videos_details(youtube, video_ids, cache=None, budget=None):
+    details = {}
+    for batch in chunked(video_ids, VIDEOS_LIST_MAX_IDS):
+        request = youtube.videos().list(part="snippet,contentDetails", id=','.join(batch))
+        with metrics.timer('metadata'):
+            response = execute_request(request, cache=cache, budget=budget)
+        for item in response['items']:
+            details[item['id']] = format_video_details(item)
+    return details
+
+def fetch_transcript_from_endpoint(transcript_endpoint, video_id):
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
     try:
+        with urlopen(f"{transcript_endpoint.rstrip('/')}/{video_id}", timeout=30) as response:
+            return json.load(response)
+    except HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+def get_video_transcript(video_id, rate_limiter=None, max_retries=5, cache=None, transcript_endpoint=None):
+    def fetch():
+        if transcript_endpoint:
+            return call_with_retries(fetch_transcript_from_endpoint, transcript_endpoint, video_id,
+                                     max_retries=max_retries, rate_limiter=rate_limiter)
         from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-        return ' '.join([entry['text'] for entry in transcript_list])
-    except (TranscriptsDisabled, NoTranscriptFound):
-        logging.warning(f"Transcript not available for video {video_id}")
-        return "Transcript not available."
+        try:
+            return call_with_retries(YouTubeTranscriptApi.get_transcript, video_id,
+                                     max_retries=max_retries, rate_limiter=rate_limiter)
+        except (TranscriptsDisabled, NoTranscriptFound):
+            return None
+
+    try:
+        with metrics.timer('transcript'):
+            if cache:
+                transcript_list = cache.fetch('transcript', {'video_id': video_id}, fetch)
+            else:
+                transcript_list = fetch()
+        if transcript_list is None:
+            metrics.count('transcripts_unavailable')
+            logging.warning(f"Transcript not available for video {video_id}")
+            return TRANSCRIPT_UNAVAILABLE, []
+        segments = [{'start': entry['start'], 'duration': entry.get('duration'), 'text': entry['text']}
+                    for entry in transcript_list]
+        return ' '.join([segment['text'] for segment in segments]), segments
     except Exception as e:
+        metrics.count('transcripts_failed')
         logging.error(f"Error getting transcript for video {video_id}: {str(e)}")
-        return f"Error getting transcript: {str(e)}"
-
-def save_video_info(folder_name, video_info, transcript):
-    title = video_info['title']
-    published_at = video_info['published_at']
-    video_url = video_info['url']
-    description = video_info['description']
-    
-    date_str = datetime.strptime(published_at, "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d")
-    safe_title = "".join([c for c in title if c.isalpha() or c.isdigit() or c == ' ']).rstrip()
-    filename = f"{date_str} {safe_title}.txt"
-    
-    downloads_path = os.path.join(os.path.expanduser("~"), "Downloads", folder_name)
-    if not os.path.exists(downloads_path):
-        os.makedirs(downloads_path)
-    
-    with open(os.path.join(downloads_path, filename), 'w', encoding='utf-8') as file:
-        file.write(f"Title: {title}\n")
-        file.write(f"Published At: {published_at}\n")
-        file.write(f"URL: {video_url}\n")
-        file.write(f"Description: {description}\n")
-        file.write(f"Transcript: {transcript}\n")
-
-def main():
-    logging.info("Starting script...")
-    verify_virtualenv()
-    logging.info("Virtual environment verified.")
-    
-    required_modules = ['requests', 'bs4', 'googleapiclient', 'youtube_transcript_api']
-    install_missing_modules(required_modules)
+        return f"{TRANSCRIPT_ERROR_PREFIX}: {str(e)}", []
 
-    try:
-        from googleapiclient.discovery import build
-        from googleapiclient.errors import HttpError
-        youtube_api_key = get_youtube_api_key()
-        youtube = build('youtube', 'v3', developerKey=youtube_api_key)
-        
-        url_input = input("Enter your YouTube channel or playlist URL: ").strip()
-        
-        if 'list=' in url_input:
-            playlist_id = get_playlist_id(url_input)
-            video_ids = get_playlist_video_ids(youtube, playlist_id)
-            folder_name = input("Enter a folder name for the playlist: ").strip()
-            logging.info(f"Found {len(video_ids)} videos in the playlist.")
+def get_output_path(folder_name):
+    return os.path.join(os.path.expanduser("~"), "Downloads", folder_name)
+
+def transcript_status(transcript):
+    if transcript == TRANSCRIPT_UNAVAILABLE:
+        return 'unavailable'
+    if transcript.startswith(TRANSCRIPT_ERROR_PREFIX):
+        return 'failed'
+    return 'done'
+
+def transcript_hash(transcript):
+    return hashlib.sha1(transcript.encode('utf-8')).hexdigest()
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def make_record(video_info, transcript, segments):
+    return dict(video_info,
+                transcript=transcript,
+                segments=segments,
+                transcript_status=transcript_status(transcript),
+                fetched_at=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+class TextSink:
+    # One human-readable .txt per video, as the scraper has always written.
+    append_only = False
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        os.makedirs(folder_path, exist_ok=True)
+
+    def path_for(self, record):
+        date_str = datetime.strptime(record['published_at'], "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d")
+        safe_title = "".join([c for c in record['title'] if c.isalpha() or c.isdigit() or c == ' ']).rstrip()
+        return os.path.join(self.folder_path, f"{date_str} {safe_title}.txt")
+
+    def write_batch(self, records):
+        for record in records:
+            with open(self.path_for(record), 'w', encoding='utf-8') as file:
+                file.write(f"Title: {record['title']}\n")
+                file.write(f"Published At: {record['published_at']}\n")
+                file.write(f"URL: {record['url']}\n")
+                file.write(f"Description: {record['description']}\n")
+                file.write(f"Transcript: {record['transcript']}\n")
+                if record['segments']:
+                    file.write("Segments:\n")
+                    for segment in record['segments']:
+                        file.write(f"[{format_timestamp(segment['start'])}] {segment['text']}\n")
+
+    def close(self):
+        pass
+
+class JsonlSink:
+    # Append-only videos.jsonl. Compressed output is reopened for every batch so each
+    # batch is a complete gzip member / zstd frame; both formats read concatenated
+    # members as one stream, and a crash can only lose the batch being written.
+    append_only = True
+
+    def __init__(self, folder_path, compression=None):
+        os.makedirs(folder_path, exist_ok=True)
+        self.file = None
+        if compression == 'gzip':
+            import gzip
+            self.path = os.path.join(folder_path, "videos.jsonl.gz")
+            self.open_batch = lambda: gzip.open(self.path, 'at', encoding='utf-8')
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstd compression requires the 'zstandard' package.")
+            self.path = os.path.join(folder_path, "videos.jsonl.zst")
+            self.open_batch = lambda: zstandard.open(self.path, 'at', encoding='utf-8')
         else:
-            channel_id = get_channel_id(youtube, url_input)
-            
-            channel_request = youtube.channels().list(part="statistics", id=channel_id)
-            channel_response = channel_request.execute()
-            video_count = int(channel_response['items'][0]['statistics']['videoCount'])
-            
-            logging.info(f"The channel has {video_count} videos.")
-            confirm = input("Do you want to proceed with processing these videos? (yes/no): ").strip().lower()
-            if confirm not in ['yes', 'y']:
-                logging.info("Operation cancelled by the user.")
-                return
-            
-            video_ids = []
-            next_page_token = None
-            while True:
-                request = youtube.search().list(
-                    part="id",
-                    channelId=channel_id,
-                    maxResults=50,
-                    pageToken=next_page_token
-                )
-                response = request.execute()
-                video_ids.extend([item['id']['videoId'] for item in response['items'] if item['id']['kind'] == 'youtube#video'])
-                next_page_token = response.get('nextPageToken')
-                if not next_page_token:
+            self.path = os.path.join(folder_path, "videos.jsonl")
+            self.open_batch = None
+            self.file = open(self.path, 'a', encoding='utf-8')
+
+    def path_for(self, record):
+        return self.path
+
+    def write_batch(self, records):
+        lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        if self.open_batch:
+            with self.open_batch() as file:
+                file.write(lines)
+        else:
+            self.file.write(lines)
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+class SqliteSink:
+    COLUMNS = ['video_id', 'channel_id', 'author', 'title', 'published_at', 'fetched_at', 'duration',
+               'duration_seconds', 'description', 'url', 'transcript', 'transcript_status']
+    append_only = False
+
+    def __init__(self, folder_path):
+        os.makedirs(folder_path, exist_ok=True)
+        self.path = os.path.join(folder_path, "videos.db")
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                channel_id TEXT,
+                author TEXT,
+                title TEXT,
+                published_at TEXT,
+                fetched_at TEXT,
+                duration TEXT,
+                duration_seconds INTEGER,
+                description TEXT,
+                url TEXT,
+                transcript TEXT,
+                transcript_status TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS segments (
+                video_id TEXT NOT NULL,
+                start REAL NOT NULL,
+                duration REAL,
+                text TEXT
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS segments_video_id ON segments (video_id, start)")
+
+    def path_for(self, record):
+        return self.path
+
+    def write_batch(self, records):
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO videos ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+            [tuple(record.get(column) for column in self.COLUMNS) for record in records])
+        self.conn.executemany("DELETE FROM segments WHERE video_id = ?", [(record['video_id'],) for record in records])
+        self.conn.executemany(
+            "INSERT INTO segments (video_id, start, duration, text) VALUES (?, ?, ?, ?)",
+            [(record['video_id'], segment['start'], segment['duration'], segment['text'])
+             for record in records for segment in record['segments']])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+class SearchIndex:
+    # SQLite FTS5 index over transcript segments from every scraped folder, updated
+    # as each batch is written and ranked with BM25 at query time. Segments live in a
+    # plain table indexed by video_id and the FTS5 table is an external-content index
+    # over it, so replacing a video's segments never scans the whole index.
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                title TEXT,
+                author TEXT,
+                published_at TEXT,
+                url TEXT
+            );
+            CREATE TABLE IF NOT EXISTS segment_rows (
+                id INTEGER PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                start REAL NOT NULL,
+                text TEXT
+            );
+            CREATE INDEX IF NOT EXISTS segment_rows_video_id ON segment_rows (video_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                text,
+                content = 'segment_rows',
+                content_rowid = 'id',
+                tokenize = 'porter unicode61'
+            );
+        ''')
+
+    def write_batch(self, records):
+        with self.lock:
+            self.write_records(records)
+
+    def write_records(self, records):
+        video_ids = [(record['video_id'],) for record in records]
+        self.conn.executemany(
+            "INSERT INTO segments_fts (segments_fts, rowid, text) "
+            "SELECT 'delete', id, text FROM segment_rows WHERE video_id = ?", video_ids)
+        self.conn.executemany("DELETE FROM segment_rows WHERE video_id = ?", video_ids)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO videos (video_id, title, author, published_at, url) VALUES (?, ?, ?, ?, ?)",
+            [(record['video_id'], record['title'], record['author'], record['published_at'], record['url'])
+             for record in records])
+        self.conn.executemany(
+            "INSERT INTO segment_rows (video_id, start, text) VALUES (?, ?, ?)",
+            [(record['video_id'], segment['start'], segment['text'])
+             for record in records for segment in record['segments']])
+        self.conn.executemany(
+            "INSERT INTO segments_fts (rowid, text) SELECT id, text FROM segment_rows WHERE video_id = ?", video_ids)
+        self.conn.commit()
+
+    def search(self, query, limit=10):
+        # Ranks every matching segment but keeps only each video's best one (SQLite
+        # returns the bare `id` from the row holding MIN(rank)), then builds snippets for
+        # just the `limit` winners.
+        best = self.conn.execute('''
+            SELECT segment_rows.id, MIN(hits.rank) AS best_rank
+            FROM (SELECT rowid, rank FROM segments_fts WHERE segments_fts MATCH ?) AS hits
+            JOIN segment_rows ON segment_rows.id = hits.rowid
+            GROUP BY segment_rows.video_id
+            ORDER BY best_rank
+            LIMIT ?
+        ''', (query, limit)).fetchall()
+        if not best:
+            return []
+        ids = [segment_id for segment_id, rank in best]
+        placeholders = ', '.join('?' for _ in ids)
+        snippets = dict(self.conn.execute(
+            f"SELECT rowid, snippet(segments_fts, 0, '[', ']', '...', 12) FROM segments_fts "
+            f"WHERE segments_fts MATCH ? AND rowid IN ({placeholders})", (query, *ids)))
+        rows = {row[0]: row[1:] for row in self.conn.execute(
+            f"SELECT segment_rows.id, videos.title, videos.author, videos.url, segment_rows.start "
+            f"FROM segment_rows JOIN videos ON videos.video_id = segment_rows.video_id "
+            f"WHERE segment_rows.id IN ({placeholders})", ids)}
+        results = []
+        for segment_id in ids:
+            title, author, url, start = rows[segment_id]
+            results.append({'title': title, 'author': author, 'start': start, 'snippet': snippets[segment_id],
+                            'url': f"{url}&t={int(start)}s"})
+        return results
+
+    def close(self):
+        self.conn.close()
+
+def search_index(args):
+    if not os.path.exists(args.index):
+        logging.error(f"No search index at {args.index}; scrape some videos first.")
+        return
+    index = SearchIndex(args.index)
+    started = time.perf_counter()
+    try:
+        results = index.search(args.query, limit=args.limit)
+    except sqlite3.OperationalError as e:
+        logging.error(f"Invalid search query: {e}")
+        return
+    finally:
+        index.close()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for result in results:
+        print(f"{result['title']} ({result['author']}) [{format_timestamp(result['start'])}]")
+        print(f"  {result['url']}")
+        print(f"  {result['snippet']}")
+    print(f"{len(results)} results in {elapsed_ms:.1f} ms")
+
+def make_sink(output_format, folder_path, compression=None):
+    if output_format == 'jsonl':
+        return JsonlSink(folder_path, compression=compression)
+    if compression:
+        raise ValueError("Compression is only supported for the jsonl output format.")
+    if output_format == 'sqlite':
+        return SqliteSink(folder_path)
+    return TextSink(folder_path)
+
+def pending_video_ids(video_ids, state, label=None):
+    finished = state.finished_video_ids()
+    seen = set()
+    skipped = 0
+    for video_id in video_ids:
+        if video_id in finished:
+            skipped += 1
+            continue
+        seen.add(video_id)
+        yield video_id
+    retry_ids = [video_id for video_id in state.retry_video_ids() if video_id not in seen]
+    prefix = f"[{label}] " if label else ''
+    logging.info(f"{prefix}Skipped {skipped} already downloaded videos; retrying {len(retry_ids)} earlier failures.")
+    yield from retry_ids
+
+def process_videos(youtube, sink, video_ids, total=None, workers=4, rate_limiter=None, max_retries=5, state=None,
+                   cache=None, batch_size=50, index=None, budget=None, executor=None, label=None,
+                   transcript_endpoint=None):
+    # Metadata is fetched 50 IDs at a time as `video_ids` is consumed, so a generator
+    # source keeps paging while the first videos download. Results are consumed in
+    # submission order so progress stays sequential even though workers finish out
+    # of order; the window bounds how far ahead they may run. Records reach the sink
+    # in batches and are marked in the state store only once written. Passing a shared
+    # `executor` lets several sources interleave on one worker pool.
+    window = max(1, workers) * 4
+    prefix = f"[{label}] " if label else ''
+    own_executor = executor is None
+    pending = deque()
+    records = []
+    latest_published_at = None
+
+    def flush():
+        if not records:
+            return
+        with metrics.timer('write'):
+            written = write_records()
+        metrics.count('videos_written', written)
+        metrics.count('videos_unchanged', len(records) - written)
+        records.clear()
+
+    def write_records():
+        changed = records
+        if state and sink.append_only:
+            # A retried video that comes back the same (e.g. still no transcript) is
+            # already in the file, so it only gets its state row refreshed.
+            previous = state.retried_versions([record['video_id'] for record in records])
+            changed = [record for record in records if previous.get(record['video_id']) !=
+                       (record['transcript_status'], transcript_hash(record['transcript']))]
+        try:
+            if changed:
+                sink.write_batch(changed)
+            results = [(record, record['transcript_status'], sink.path_for(record)) for record in records]
+        except Exception as e:
+            logging.error(f"{prefix}Error writing {len(changed)} videos: {str(e)}")
+            changed_ids = {record['video_id'] for record in changed}
+            results = [(record, 'failed', None) if record['video_id'] in changed_ids
+                       else (record, record['transcript_status'], sink.path_for(record)) for record in records]
+            changed = []
+        if index and changed:
+            try:
+                index.write_batch(changed)
+            except Exception as e:
+                logging.error(f"{prefix}Error indexing {len(changed)} videos: {str(e)}")
+        if state:
+            state.record_videos([(record['video_id'], record['published_at'], status, output_path,
+                                  transcript_hash(record['transcript']))
+                                 for record, status, output_path in results])
+        return len(changed)
+
+    def drain_one():
+        idx, video_id, video_info, future = pending.popleft()
+        logging.info(f"{prefix}Processing video {idx}/{total}..." if total else f"{prefix}Processing video {idx}...")
+        metrics.count('videos_processed')
+        if future is not None and future.cancelled():
+            # Interrupted before it started; left unrecorded so the next run picks it up.
+            return
+        if future is None:
+            metrics.count('videos_missing')
+            logging.warning(f"{prefix}Could not get details for video {video_id} (private or deleted)")
+            return
+        try:
+            records.append(make_record(video_info, *future.result()))
+        except Exception as e:
+            logging.error(f"{prefix}Error processing video {video_id}: {str(e)}")
+            if state:
+                state.record_videos([(video_id, video_info['published_at'], 'failed', None, None)])
+            return
+        if len(records) >= batch_size:
+            flush()
+
+    idx = 0
+    metadata_requests = 0
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for batch in chunked(video_ids, VIDEOS_LIST_MAX_IDS):
+            if stop_requested.is_set():
+                break
+            video_details = get_videos_details(youtube, batch, cache=cache, budget=budget)
+            metadata_requests += 1
+            for video_id in batch:
+                if stop_requested.is_set():
                     break
-            
-            folder_name = input("Enter a folder name for the channel: ").strip()
-            logging.info(f"Found {len(video_ids)} videos in the channel.")
-        
-        confirm = input("Do you want to proceed with processing these videos? (yes/no): ").strip().lower()
-        if confirm not in ['yes', 'y']:
+                idx += 1
+                video_info = video_details.get(video_id)
+                future = None
+                if video_info:
+                    latest_published_at = max(latest_published_at or '', video_info['published_at'])
+                    future = executor.submit(get_video_transcript, video_id, rate_limiter=rate_limiter,
+                                             max_retries=max_retries, cache=cache,
+                                             transcript_endpoint=transcript_endpoint)
+                    submitted_at = time.perf_counter()
+                    # Per-video latency: from submission until its transcript is ready.
+                    future.add_done_callback(
+                        lambda done, submitted_at=submitted_at: metrics.observe('video', time.perf_counter() - submitted_at))
+                pending.append((idx, video_id, video_info, future))
+                if len(pending) >= window:
+                    drain_one()
+    finally:
+        # Also runs when enumeration stops early (e.g. quota exhausted), so everything
+        # already downloaded is written and recorded before the error propagates.
+        while pending:
+            drain_one()
+        flush()
+        if own_executor:
+            executor.shutdown()
+
+    saved = idx - metadata_requests
+    logging.info(f"{prefix}Fetched details for {idx} videos in {metadata_requests} requests "
+                 f"(saved {saved} requests / {saved} quota units versus per-video lookups).")
+    return latest_published_at
+
+def confirm_interactively():
+    confirm = input("Do you want to proceed with processing these videos? (yes/no): ").strip().lower()
+    return confirm in ['yes', 'y']
+
+def run_source(youtube, url, folder_name, args, executor=None, rate_limiter=None, cache=None, index=None,
+               budget=None, confirm=None):
+    prefix = f"[{folder_name}] "
+    state = StateStore(get_output_path(folder_name))
+    try:
+        if 'list=' in url:
+            source_id = get_playlist_id(url)
+            video_ids = get_playlist_video_ids(youtube, source_id, cache=cache, budget=budget)
+            logging.info(f"{prefix}Found {len(video_ids)} videos in the playlist.")
+            if not args.full:
+                video_ids = list(pending_video_ids(video_ids, state, label=folder_name))
+            total = len(video_ids)
+        else:
+            channel = get_channel(youtube, url, cache=cache, budget=budget)
+            video_count = int(channel['statistics']['videoCount'])
+            logging.info(f"{prefix}The channel has {video_count} videos.")
+            source_id = channel['id']
+            published_after = None if args.full else state.last_sync(source_id)
+            if published_after:
+                logging.info(f"{prefix}Fetching only videos published after the last sync ({published_after}).")
+            uploads_playlist_id = channel['contentDetails']['relatedPlaylists']['uploads']
+            video_ids = iter_playlist_video_ids(youtube, uploads_playlist_id, published_after=published_after,
+                                                cache=cache, budget=budget)
+            if not args.full:
+                video_ids = pending_video_ids(video_ids, state, label=folder_name)
+            total = video_count if args.full or not state.finished_video_ids() else None
+
+        if confirm and not confirm():
             logging.info("Operation cancelled by the user.")
             return
 
-        for idx, video_id in enumerate(video_ids, start=1):
+        sink = make_sink(args.output, get_output_path(folder_name), compression=args.compress)
+        try:
+            latest_published_at = process_videos(youtube, sink, video_ids, total=total, workers=args.workers,
+                                                 rate_limiter=rate_limiter, max_retries=args.max_retries, state=state,
+                                                 cache=cache, batch_size=args.batch_size, index=index, budget=budget,
+                                                 executor=executor, label=folder_name,
+                                                 transcript_endpoint=args.transcript_endpoint)
+        finally:
+            sink.close()
+        if stop_requested.is_set():
+            # Older videos were never reached, so keep the previous sync point.
+            return
+        last_published_at = max(latest_published_at or '', state.last_sync(source_id) or '')
+        state.record_sync(source_id, last_published_at or None)
+    finally:
+        state.close()
+
+def load_jobs(args):
+    jobs = [{'url': url, 'folder': folder} for url, folder in args.source or []]
+    if args.jobs:
+        with open(args.jobs, 'r', encoding='utf-8') as file:
+            for job in json.load(file):
+                if 'url' not in job or 'folder' not in job:
+                    raise ValueError(f"Job entries in {args.jobs} need a 'url' and a 'folder': {job}")
+                jobs.append(job)
+    return jobs
+
+def run_jobs(youtube, jobs, args, rate_limiter=None, cache=None, index=None, budget=None, confirm=None):
+    # Every source shares one transcript worker pool; each source's bounded window
+    # keeps it from crowding out the others, so their videos interleave fairly.
+    deferred = []
+    failed = []
+    stop_requested.clear()
+    executor = ThreadPoolExecutor(max_workers=max(1, args.workers))
+    coordinators = ThreadPoolExecutor(max_workers=max(1, args.parallel_sources))
+    try:
+        futures = [(job, coordinators.submit(run_source, youtube, job['url'], job['folder'], args, executor=executor,
+                                             rate_limiter=rate_limiter, cache=cache, index=index, budget=budget,
+                                             confirm=confirm))
+                   for job in jobs]
+        for job, future in futures:
             try:
-                logging.info(f"Processing video {idx}/{len(video_ids)}...")
-                video_info = get_video_details(youtube, video_id)
-                if video_info:
-                    transcript = get_video_transcript(video_id)
-                    save_video_info(folder_name, video_info, transcript)
-                else:
-                    logging.warning(f"Could not get details for video {video_id}")
+                future.result()
+            except QuotaExhaustedError as e:
+                logging.warning(f"[{job['folder']}] Deferred: {e}")
+                deferred.append(job)
             except Exception as e:
-                logging.error(f"Error processing video {video_id}: {str(e)}")
-                continue  # Continue with the next video
+                logging.error(f"[{job['folder']}] Failed: {e}")
+                failed.append(job)
+    except KeyboardInterrupt:
+        logging.warning("Interrupted; writing the videos already downloaded before exiting.")
+        stop_requested.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        # Sources that haven't started are cancelled; running ones stop submitting and
+        # flush their finished videos before this returns.
+        coordinators.shutdown(cancel_futures=True)
+        executor.shutdown()
+    if deferred:
+        logging.warning(f"{len(deferred)} sources deferred until the quota resets; re-run to resume them.")
+    if budget:
+        logging.info(f"Quota used today: {budget.units_used()} units across {len(budget.api_keys)} API keys.")
+    logging.info(f"Finished {len(jobs) - len(deferred) - len(failed)}/{len(jobs)} sources.")
+    return deferred, failed
+
+def emit_metrics(metrics_file=None):
+    summary = json.dumps(metrics.summary(), sort_keys=True)
+    logging.info(f"Run summary: {summary}")
+    if metrics_file:
+        with open(metrics_file, 'w', encoding='utf-8') as file:
+            file.write(summary + '\n')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Download transcripts and information from YouTube videos.")
+    parser.add_argument('--source', nargs=2, action='append', metavar=('URL', 'FOLDER'),
+                        help="Channel or playlist URL and its output folder; repeat for several sources. "
+                             "Runs without prompting.")
+    parser.add_argument('--jobs', metavar='FILE',
+                        help="JSON file listing sources as [{\"url\": ..., \"folder\": ...}]. Runs without prompting.")
+    parser.add_argument('--parallel-sources', type=int, default=4,
+                        help="Number of sources enumerated and written at once (default: 4).")
+    parser.add_argument('--api-key', action='append', dest='api_keys', metavar='KEY',
+                        help="YouTube API key; repeat to rotate through several keys.")
+    parser.add_argument('--daily-quota', type=int, default=10000,
+                        help="Daily quota units per API key (default: 10000).")
+    parser.add_argument('--quota-file',
+                        default=os.path.join(os.path.expanduser("~"), ".local", "state", "yt-scraper", "quota.json"),
+                        help="Where quota usage is tracked across runs.")
+    parser.add_argument('--wait-for-quota', action='store_true',
+                        help="Pause until the daily quota resets instead of deferring the remaining sources.")
+    parser.add_argument('--install-deps', action='store_true',
+                        help="Install missing dependencies with pip before running.")
+    parser.add_argument('--startup-only', action='store_true',
+                        help="Exit once startup finishes; useful for timing it.")
+    parser.add_argument('--api-endpoint',
+                        help="Send YouTube Data API requests here instead of googleapis.com (e.g. a local stand-in).")
+    parser.add_argument('--transcript-endpoint',
+                        help="Fetch transcripts as JSON from <URL>/<video_id> instead of YouTube.")
+    parser.add_argument('--metrics-file',
+                        help="Also write the end-of-run JSON metrics summary to this file.")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Number of videos processed concurrently (default: 4).")
+    parser.add_argument('--rate-limit', type=float, default=2.0,
+                        help="Maximum transcript requests per second across all workers; 0 disables (default: 2).")
+    parser.add_argument('--max-retries', type=int, default=5,
+                        help="Retries with exponential backoff on transient errors and 429s (default: 5).")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the folder's sync state and re-download every video.")
+    parser.add_argument('--output', choices=['txt', 'jsonl', 'sqlite'], default='txt',
+                        help="Output format: one .txt per video (default), videos.jsonl, or videos.db.")
+    parser.add_argument('--compress', choices=['gzip', 'zstd'],
+                        help="Compress jsonl output.")
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help="Number of videos buffered before each write (default: 50).")
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH,
+                        help="Full-text search index updated as videos are written.")
+    parser.add_argument('--no-index', action='store_true',
+                        help="Do not update the search index.")
+    parser.add_argument('--cache-dir', default=os.path.join(os.path.expanduser("~"), ".cache", "yt-scraper"),
+                        help="Directory for cached API and transcript responses.")
+    parser.add_argument('--cache-max-mb', type=int, default=512,
+                        help="Evict least recently used cache entries beyond this size (default: 512).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Fetch everything fresh and do not write to the cache.")
+    parser.add_argument('--offline', action='store_true',
+                        help="Serve only from the cache; never touch the network.")
+    subparsers = parser.add_subparsers(dest='command')
+    search_parser = subparsers.add_parser('search', help="Search scraped transcripts.")
+    search_parser.add_argument('query', help="FTS5 query, e.g. 'machine learning' or '\"exact phrase\"'.")
+    search_parser.add_argument('--limit', type=int, default=10, help="Maximum number of results (default: 10).")
+    search_parser.add_argument('--index', default=argparse.SUPPRESS,
+                               help="Search index to query (default: the scraper's --index).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global STARTED_AT
+    # The first run in a process counts module imports as startup; later in-process
+    # runs (e.g. benchmarks) start counting here.
+    startup_started_at = STARTED_AT or time.perf_counter()
+    STARTED_AT = None
+    args = parse_args(argv)
+    if args.command == 'search':
+        search_index(args)
+        return
+    logging.info("Starting script...")
+    metrics.reset()
+    if args.install_deps:
+        install_missing_modules(REQUIRED_PACKAGES)
+    try:
+        from googleapiclient.errors import HttpError
+    except ImportError as e:
+        logging.error(f"Missing dependency ({e}). Re-run with --install-deps, or use yt-scraper.sh "
+                      f"to run inside the virtual environment.")
+        return
+
+    try:
+        jobs = load_jobs(args)
+        interactive = not jobs
+        if args.offline and args.no_cache:
+            raise ValueError("--offline needs the cache; drop --no-cache.")
+        cache = None if args.no_cache else ResponseCache(args.cache_dir, args.cache_max_mb * 1024 * 1024,
+                                                         offline=args.offline)
+        budget = None
+        if args.offline:
+            # Offline runs never send the key, so don't ask for one.
+            youtube_api_key = 'offline'
+        else:
+            api_keys = get_youtube_api_keys(args.api_keys, interactive=interactive)
+            youtube_api_key = api_keys[0]
+            budget = QuotaBudget(api_keys, daily_limit=args.daily_quota, path=args.quota_file,
+                                 wait=args.wait_for_quota)
+        youtube = get_youtube_client(youtube_api_key, api_endpoint=args.api_endpoint)
+        startup_seconds = time.perf_counter() - startup_started_at
+        metrics.observe('startup', startup_seconds)
+        logging.info(f"Startup finished in {startup_seconds * 1000:.0f} ms.")
+        if args.startup_only:
+            return
+        
+        if interactive:
+            url_input = input("Enter your YouTube channel or playlist URL: ").strip()
+            folder_name = input("Enter a folder name for the channel or playlist: ").strip()
+            jobs = [{'url': url_input, 'folder': folder_name}]
+
+        rate_limiter = RateLimiter(args.rate_limit) if args.rate_limit > 0 else None
+        index = None if args.no_index else SearchIndex(args.index)
+        try:
+            run_jobs(youtube, jobs, args, rate_limiter=rate_limiter, cache=cache, index=index, budget=budget,
+                     confirm=confirm_interactively if interactive else None)
+        finally:
+            if index:
+                index.close()
 
     except HttpError as e:
         logging.error(f"An HTTP error occurred: {e}")
@@ -204,6 +1270,8 @@ def main():
         logging.error(f"Value error: {e}")
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+    finally:
+        emit_metrics(args.metrics_file)
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,5 @@
 #!/bin/bash
 
-# Activate the virtual environment
-source "venv/bin/activate"
-
-# Run the Python script
-python3 /Users/gtrusler/Developer/yt-scraper/yt-scraper.py
-
-# Deactivate the virtual environment
-deactivate
\ No newline at end of file
+# Run the script with the virtual environment's interpreter; no activation needed
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+exec "$SCRIPT_DIR/venv/bin/python3" "$SCRIPT_DIR/yt-scraper.py" "$@"